@@ -0,0 +1,91 @@
+# bench/render_load.py
+#
+# 本机渲染服务压测：并发发送若干种不同的渲染请求，统计状态码、客户端延迟
+# 以及服务端 /metrics。
+#
+# 用法: python -m bench.render_load [--requests 500] [--concurrency 32] [--distinct 8] [--url http://127.0.0.1:8765]
+# 不指定 --url 时在本进程内启动一个临时服务。
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.render_server import RenderService, create_server
+
+
+def post(url, payload):
+    request = urllib.request.Request(url + '/render', data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def run_load(url, requests=500, concurrency=32, distinct=8, fmt='png'):
+    payloads = [{'expr': 'sin(a * x) + b', 'params': {'a': i % distinct, 'b': 1}, 'format': fmt}
+                for i in range(requests)]
+
+    def timed_post(payload):
+        start = time.perf_counter()
+        status, _ = post(url, payload)
+        return status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_post, payloads))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    with urllib.request.urlopen(url + '/metrics') as response:
+        metrics = json.loads(response.read())
+    return {
+        'status': dict(Counter(status for status, _ in results)),
+        'throughput': requests / elapsed,
+        'latency_ms': {
+            'p50': 1000 * statistics.median(latencies),
+            'p95': 1000 * latencies[int(len(latencies) * 0.95)],
+            'max': 1000 * latencies[-1],
+        },
+        'server': metrics,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="渲染服务压测")
+    arg_parser.add_argument('--url')
+    arg_parser.add_argument('--requests', type=int, default=500)
+    arg_parser.add_argument('--concurrency', type=int, default=32)
+    arg_parser.add_argument('--distinct', type=int, default=8)
+    arg_parser.add_argument('--format', default='png')
+    arg_parser.add_argument('--workers', type=int, default=4)
+    arg_parser.add_argument('--max-pending', type=int, default=64)
+    args = arg_parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        service = RenderService(workers=args.workers, max_pending=args.max_pending)
+        server = create_server(port=0, service=service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        result = run_load(url, args.requests, args.concurrency, args.distinct, args.format)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            service.shutdown()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,14 @@
 # main.py
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import numpy as np
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from modules.function_parser import FunctionParser
 from modules.plot_manager import PlotManager
 from modules.parameter_controller import ParameterController
+from modules.workspace import save_workspace, load_workspace
 import sympy as sp
 
 class FunctionPlotterApp:
@@ -28,6 +29,12 @@ class FunctionPlotterApp:
         # 当前绘图模式： '2D' 或 '3D'
         self.plot_mode = '2D'
 
+        # 采样区间 {变量: [起点, 终点, 点数]}，以及最近一次计算的结果
+        self.domain = {}
+        self.values = {}
+        # 从工作区加载、尚未使用的计算结果
+        self.preloaded = {}
+
         # 创建UI组件
         self.create_widgets()
 
@@ -82,6 +89,12 @@ class FunctionPlotterApp:
         save_button = ttk.Button(bottom_frame, text="保存图像", command=self.plot_manager.save_plot, bootstyle="info")
         save_button.pack(side='right')
 
+        load_ws_button = ttk.Button(bottom_frame, text="加载工作区", command=self.load_workspace, bootstyle="secondary")
+        load_ws_button.pack(side='right', padx=5)
+
+        save_ws_button = ttk.Button(bottom_frame, text="保存工作区", command=self.save_workspace, bootstyle="secondary")
+        save_ws_button.pack(side='right', padx=5)
+
     def switch_plot_mode(self):
         selected_mode = self.mode_var.get()
         if selected_mode != self.plot_mode:
@@ -117,18 +130,123 @@ class FunctionPlotterApp:
 
         # 生成x（和y）值
         if self.plot_mode == '2D':
-            self.x_vals = np.linspace(-10, 10, 400)
+            self.domain = {'x': [-10, 10, 400]}
         else:
-            self.x_vals = np.linspace(-10, 10, 100)
-            self.y_vals = np.linspace(-10, 10, 100)
-            self.X, self.Y = np.meshgrid(self.x_vals, self.y_vals)
+            self.domain = {'x': [-10, 10, 100], 'y': [-10, 10, 100]}
+        self.build_samples()
 
         # 绘制
         self.draw_plot()
 
+    def build_samples(self, arrays=None):
+        """
+        根据采样区间生成采样点；若提供了已保存的数组则直接使用。
+        """
+        arrays = arrays or {}
+        if 'x_vals' in arrays:
+            self.x_vals = arrays['x_vals']
+        else:
+            self.x_vals = np.linspace(*self.domain['x'])
+        if self.plot_mode == '3D':
+            if 'y_vals' in arrays:
+                self.y_vals = arrays['y_vals']
+            else:
+                self.y_vals = np.linspace(*self.domain['y'])
+            if 'X' in arrays and 'Y' in arrays:
+                self.X, self.Y = arrays['X'], arrays['Y']
+            else:
+                self.X, self.Y = np.meshgrid(self.x_vals, self.y_vals)
+
+    def evaluate(self, key, func, args):
+        """
+        计算函数值并记录结果；首次绘制已加载的工作区时直接使用保存的结果。
+        """
+        if key in self.preloaded:
+            vals = self.preloaded.pop(key)
+        else:
+            vals = func(*args)
+        self.values[key] = vals
+        return vals
+
+    def save_workspace(self):
+        if not self.parser:
+            messagebox.showwarning("提示", "请先绘制函数。")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".fgp",
+                                            filetypes=[("Workspace", "*.fgp"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            state = {
+                'func_str': self.parser.func_str,
+                'plot_mode': self.plot_mode,
+                'derivative': self.derivative_var.get(),
+                'integral': self.integral_var.get(),
+                'domain': self.domain,
+                'params': self.param_controller.get_state() if self.parser.params else {},
+                'compiled': self.parser.export_compiled(),
+            }
+            arrays = {'x_vals': self.x_vals}
+            if self.plot_mode == '3D':
+                arrays.update({'y_vals': self.y_vals, 'X': self.X, 'Y': self.Y})
+            arrays.update(self.values)
+            save_workspace(path, state, arrays)
+            messagebox.showinfo("保存成功", f"工作区已保存到 {path}")
+        except Exception as e:
+            messagebox.showerror("错误", f"保存工作区时出错。\n错误信息: {e}")
+
+    def load_workspace(self):
+        path = filedialog.askdirectory(title="选择工作区 (.fgp)")
+        if not path:
+            return
+        try:
+            state, arrays = load_workspace(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"加载工作区时出错。\n错误信息: {e}")
+            return
+
+        self.func_entry.delete(0, tk.END)
+        self.func_entry.insert(0, state['func_str'])
+        self.derivative_var.set(state['derivative'])
+        self.integral_var.set(state['integral'])
+        self.mode_var.set(state['plot_mode'])
+        self.plot_mode = state['plot_mode']
+        self.plot_manager.switch_mode(self.plot_mode)
+
+        variables = ['x', 'y'] if self.plot_mode == '3D' else ['x']
+        self.parser = FunctionParser(state['func_str'], variables=variables)
+        success, msg = self.parser.parse_expression()
+        if not success:
+            messagebox.showerror("错误", f"无法解析函数表达式。\n错误信息: {msg}")
+            return
+
+        # 优先使用保存的导数和积分表达式，失败时重新求导和积分
+        success, msg = self.parser.load_compiled(state['compiled']) if 'compiled' in state else (False, "")
+        if not success:
+            arrays = {}
+            success, msg = self.parser.generate_functions()
+            if not success:
+                messagebox.showerror("错误", f"无法生成函数。\n错误信息: {msg}")
+                return
+
+        if self.parser.params:
+            self.param_controller = ParameterController(self.params_frame, self.parser.params, self.update_plot)
+            self.param_controller.set_state(state['params'])
+        else:
+            for widget in self.params_frame.winfo_children():
+                widget.destroy()
+
+        self.domain = state['domain']
+        self.build_samples(arrays)
+        self.preloaded = {key: vals for key, vals in arrays.items()
+                          if key not in ('x_vals', 'y_vals', 'X', 'Y')}
+        self.draw_plot()
+        self.preloaded = {}
+
     def draw_plot(self):
         try:
             self.plot_manager.clear_plot()
+            self.values = {}
 
             # 获取参数值
             if self.parser.params:
@@ -145,19 +263,19 @@ class FunctionPlotterApp:
                     args = [self.x_vals]
 
                 # 绘制原函数
-                y_vals = self.parser.lambdified_func(*args)
+                y_vals = self.evaluate('f', self.parser.lambdified_func, args)
                 self.plot_manager.plot_functions_2d(self.x_vals, y_vals, label=f"f(x) = {sp.pretty(self.parser.expr)}",
                                                      color='blue', linestyle='-')
 
                 # 绘制导数
                 if self.derivative_var.get():
-                    dy_vals = self.parser.lambdified_derivative(*args)
+                    dy_vals = self.evaluate('d_x', self.parser.lambdified_derivative, args)
                     self.plot_manager.plot_functions_2d(self.x_vals, dy_vals, label=f"f'(x) = {sp.pretty(self.parser.derivative_expr)}",
                                                          color='green', linestyle='--')
 
                 # 绘制积分
                 if self.integral_var.get():
-                    integral_vals = self.parser.lambdified_integral(*args)
+                    integral_vals = self.evaluate('i_x', self.parser.lambdified_integral, args)
                     self.plot_manager.plot_functions_2d(self.x_vals, integral_vals, label=f"∫f(x)dx = {sp.pretty(self.parser.integral_expr)}",
                                                          color='red', linestyle=':')
 
@@ -171,14 +289,14 @@ class FunctionPlotterApp:
                 print(f"3D绘图参数顺序: {args}")  # 调试信息
 
                 # 绘制原函数
-                z_vals = self.parser.lambdified_func(*args)
+                z_vals = self.evaluate('f', self.parser.lambdified_func, args)
                 self.plot_manager.plot_functions_3d(self.X, self.Y, z_vals, label=f"f(x, y) = {sp.pretty(self.parser.expr)}",
                                                      color='blue')
 
                 # 绘制导数（偏导数）
                 if self.derivative_var.get():
                     for var in self.parser.derivative_expr:
-                        dz_vals = self.parser.lambdified_derivative[var](*args)
+                        dz_vals = self.evaluate(f'd_{var}', self.parser.lambdified_derivative[var], args)
                         label = f"∂f/∂{var} = {sp.pretty(self.parser.derivative_expr[var])}"
                         self.plot_manager.plot_functions_3d(self.X, self.Y, dz_vals, label=label,
                                                            color='green')
@@ -186,7 +304,7 @@ class FunctionPlotterApp:
                 # 绘制积分（如果需要）
                 if self.integral_var.get():
                     for var in self.parser.integral_expr:
-                        integral_vals = self.parser.lambdified_integral[var](*args)
+                        integral_vals = self.evaluate(f'i_{var}', self.parser.lambdified_integral[var], args)
                         label = f"∫f d{var} = {sp.pretty(self.parser.integral_expr[var])}"
                         self.plot_manager.plot_functions_3d(self.X, self.Y, integral_vals, label=label,
                                                            color='red')
@@ -210,6 +328,7 @@ class FunctionPlotterApp:
                 return
 
             self.plot_manager.clear_plot()
+            self.values = {}
 
             # 获取参数值
             if self.parser.params:
@@ -226,19 +345,19 @@ class FunctionPlotterApp:
                     args = [self.x_vals]
 
                 # 绘制原函数
-                y_vals = self.parser.lambdified_func(*args)
+                y_vals = self.evaluate('f', self.parser.lambdified_func, args)
                 self.plot_manager.plot_functions_2d(self.x_vals, y_vals, label=f"f(x) = {sp.pretty(self.parser.expr)}",
                                                      color='blue', linestyle='-')
 
                 # 绘制导数
                 if self.derivative_var.get():
-                    dy_vals = self.parser.lambdified_derivative(*args)
+                    dy_vals = self.evaluate('d_x', self.parser.lambdified_derivative, args)
                     self.plot_manager.plot_functions_2d(self.x_vals, dy_vals, label=f"f'(x) = {sp.pretty(self.parser.derivative_expr)}",
                                                          color='green', linestyle='--')
 
                 # 绘制积分
                 if self.integral_var.get():
-                    integral_vals = self.parser.lambdified_integral(*args)
+                    integral_vals = self.evaluate('i_x', self.parser.lambdified_integral, args)
                     self.plot_manager.plot_functions_2d(self.x_vals, integral_vals, label=f"∫f(x)dx = {sp.pretty(self.parser.integral_expr)}",
                                                          color='red', linestyle=':')
 
@@ -252,14 +371,14 @@ class FunctionPlotterApp:
                 print(f"3D绘图更新参数顺序: {args}")  # 调试信息
 
                 # 绘制原函数
-                z_vals = self.parser.lambdified_func(*args)
+                z_vals = self.evaluate('f', self.parser.lambdified_func, args)
                 self.plot_manager.plot_functions_3d(self.X, self.Y, z_vals, label=f"f(x, y) = {sp.pretty(self.parser.expr)}",
                                                      color='blue')
 
                 # 绘制导数（偏导数）
                 if self.derivative_var.get():
                     for var in self.parser.derivative_expr:
-                        dz_vals = self.parser.lambdified_derivative[var](*args)
+                        dz_vals = self.evaluate(f'd_{var}', self.parser.lambdified_derivative[var], args)
                         label = f"∂f/∂{var} = {sp.pretty(self.parser.derivative_expr[var])}"
                         self.plot_manager.plot_functions_3d(self.X, self.Y, dz_vals, label=label,
                                                            color='green')
@@ -267,7 +386,7 @@ class FunctionPlotterApp:
                 # 绘制积分（如果需要）
                 if self.integral_var.get():
                     for var in self.parser.integral_expr:
-                        integral_vals = self.parser.lambdified_integral[var](*args)
+                        integral_vals = self.evaluate(f'i_{var}', self.parser.lambdified_integral[var], args)
                         label = f"∫f d{var} = {sp.pretty(self.parser.integral_expr[var])}"
                         self.plot_manager.plot_functions_3d(self.X, self.Y, integral_vals, label=label,
                                                            color='red')
@@ -1,6 +1,10 @@
 # modules/function_parser.py
 
+import io
+import tokenize
+
 import sympy as sp
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, convert_xor
 
 
 class FunctionParser:
@@ -23,7 +27,7 @@ class FunctionParser:
 
     def parse_expression(self):
         try:
-            self.expr = sp.sympify(self.func_str)
+            self.expr = parse_safe_expression(self.func_str)
             symbols = sorted(self.expr.free_symbols, key=lambda s: s.name)
             # 分离参数（非自变量）
             self.params = [str(s) for s in symbols if str(s) not in [str(var) for var in self.variables]]
@@ -50,3 +54,75 @@ class FunctionParser:
             return True, ""
         except Exception as e:
             return False, str(e)
+
+    def export_compiled(self):
+        """
+        导出求导和积分的结果，便于保存后跳过耗时的求导和积分直接恢复。
+
+        :return: 可 JSON 序列化的字典
+        """
+        return {
+            'derivative_expr': {var: str(e) for var, e in self.derivative_expr.items()},
+            'integral_expr': {var: str(e) for var, e in self.integral_expr.items()},
+        }
+
+    def load_compiled(self, compiled):
+        """
+        从 export_compiled 的结果恢复函数，需先调用 parse_expression。
+        """
+        try:
+            all_symbols = self.variables + [sp.symbols(p) for p in self.params]
+            self.lambdified_func = sp.lambdify(all_symbols, self.expr, modules=['numpy'])
+            self.derivative_expr = {var: parse_safe_expression(e) for var, e in compiled['derivative_expr'].items()}
+            self.integral_expr = {var: parse_safe_expression(e) for var, e in compiled['integral_expr'].items()}
+            self.lambdified_derivative = {var: sp.lambdify(all_symbols, e, modules=['numpy'])
+                                          for var, e in self.derivative_expr.items()}
+            self.lambdified_integral = {var: sp.lambdify(all_symbols, e, modules=['numpy'])
+                                        for var, e in self.integral_expr.items()}
+            return True, ""
+        except Exception as e:
+            return False, str(e)
+
+
+def _build_namespace():
+    # 只允许 sympy 的表达式类型和常量，不提供任何内置函数
+    namespace = {'__builtins__': {}}
+    for name in dir(sp):
+        obj = getattr(sp, name)
+        if isinstance(obj, sp.Basic) or (isinstance(obj, type) and issubclass(obj, sp.Basic)):
+            namespace[name] = obj
+    for name in ('sqrt', 'cbrt', 'root'):
+        namespace[name] = getattr(sp, name)
+    # sympify 会把这些 Python 内置函数映射为 sympy 函数，保持相同的输入习惯
+    namespace.update({'abs': sp.Abs, 'max': sp.Max, 'min': sp.Min})
+    return namespace
+
+
+_SAFE_NAMESPACE = _build_namespace()
+
+
+def _check_tokens(expr_str):
+    # 按 Python 词法检查：属性访问、字符串、lambda 和双下划线都不是数学表达式所需的语法。
+    # 小数点属于数字记号（如 1.5、1.e3），不会被当作属性访问
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(expr_str).readline))
+    except (tokenize.TokenError, SyntaxError) as e:
+        raise ValueError(f"无法解析表达式: {e}")
+    for tok in tokens:
+        if (tok.type == tokenize.OP and tok.string == '.'
+                or tok.type == tokenize.STRING
+                or tokenize.tok_name[tok.type].startswith('FSTRING')
+                or tok.type == tokenize.NAME and (tok.string == 'lambda' or '__' in tok.string)):
+            raise ValueError(f"表达式包含不允许的内容: {tok.string}")
+
+
+def parse_safe_expression(expr_str):
+    """
+    解析数学表达式，只能使用白名单中的 sympy 函数和常量，不会执行任意代码。
+
+    :param expr_str: 表达式字符串，例如 "sin(a * x) + b"
+    :return: sympy 表达式
+    """
+    _check_tokens(expr_str)
+    return parse_expr(expr_str, local_dict={}, global_dict=dict(_SAFE_NAMESPACE),
+                      transformations=standard_transformations + (convert_xor,))
@@ -18,6 +18,7 @@ class ParameterController:
         self.update_callback = update_callback
         self.sliders = {}
         self.entries = {}
+        self.ranges = {param: (-10.0, 10.0) for param in self.params}
         self.create_sliders()
 
     def create_sliders(self):
@@ -33,7 +34,8 @@ class ParameterController:
 
             ttk.Label(frame, text=param, font=("Helvetica", 11)).pack(side='left', padx=5)
 
-            slider = ttk.Scale(frame, from_=-10, to=10, orient='horizontal',
+            low, high = self.ranges[param]
+            slider = ttk.Scale(frame, from_=low, to=high, orient='horizontal',
                                command=lambda val, p=param: self.on_slider_change(p, val))
             slider.set(1.0)  # 默认值
             slider.pack(side='left', fill='x', expand=True, padx=5)
@@ -54,10 +56,11 @@ class ParameterController:
     def on_entry_change(self, param, event):
         try:
             value = float(self.entries[param].get())
-            if value < -10:
-                value = -10
-            elif value > 10:
-                value = 10
+            low, high = self.ranges[param]
+            if value < low:
+                value = low
+            elif value > high:
+                value = high
             self.sliders[param].set(value)
             self.update_callback()
         except ValueError:
@@ -75,3 +78,32 @@ class ParameterController:
             except ValueError:
                 values.append(self.sliders[param].get())
         return values
+
+    def get_state(self):
+        """
+        获取各参数的当前值和取值范围，用于保存工作区。
+        """
+        values = self.get_param_values()
+        return {param: {'value': value, 'range': list(self.ranges[param])}
+                for param, value in zip(sorted(self.params), values)}
+
+    def set_state(self, state):
+        """
+        恢复参数值和取值范围，恢复过程中不触发回调。
+
+        :param state: get_state 返回的字典
+        """
+        update_callback = self.update_callback
+        self.update_callback = lambda: None
+        try:
+            for param, item in state.items():
+                if param not in self.sliders:
+                    continue
+                low, high = item['range']
+                self.ranges[param] = (float(low), float(high))
+                self.sliders[param].configure(from_=low, to=high)
+                self.sliders[param].set(item['value'])
+                self.entries[param].delete(0, tk.END)
+                self.entries[param].insert(0, f"{float(item['value']):.2f}")
+        finally:
+            self.update_callback = update_callback
@@ -1,32 +1,37 @@
 # modules/plot_manager.py
 
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 unused import
 
 
 class PlotManager:
-    def __init__(self, parent_frame, plot_mode='2D'):
+    def __init__(self, parent_frame=None, plot_mode='2D'):
         """
         初始化绘图管理器。
 
-        :param parent_frame: Tkinter父框架
+        :param parent_frame: Tkinter父框架；为 None 时使用无界面的 Agg 画布
         :param plot_mode: '2D' 或 '3D'
         """
         self.parent_frame = parent_frame
         self.plot_mode = plot_mode
-        self.fig = plt.figure(figsize=(10, 6))
-        if self.plot_mode == '3D':
-            self.ax = self.fig.add_subplot(111, projection='3d')
+        # 使用独立的 Figure，不注册到 pyplot 的全局管理器中
+        self.fig = Figure(figsize=(10, 6))
+        self.ax = self._create_axes(self.plot_mode)
+        if self.parent_frame is not None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.parent_frame)
+            self.canvas.get_tk_widget().pack(padx=10, pady=10, fill='both', expand=True)
         else:
-            self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.parent_frame)
-        self.canvas.get_tk_widget().pack(padx=10, pady=10, fill='both', expand=True)
+            self.canvas = FigureCanvasAgg(self.fig)
         self.lines = {}
         self.labels = []
 
+    def _create_axes(self, mode):
+        if mode == '3D':
+            return self.fig.add_subplot(111, projection='3d')
+        return self.fig.add_subplot(111)
+
     def switch_mode(self, mode):
         """
         切换绘图模式。
@@ -36,11 +41,10 @@ class PlotManager:
         if mode == self.plot_mode:
             return
         self.plot_mode = mode
+        # 先清空再从 Figure 中移除旧坐标轴，避免坐标轴在多次切换后叠加
         self.ax.clear()
-        if self.plot_mode == '3D':
-            self.ax = self.fig.add_subplot(111, projection='3d')
-        else:
-            self.ax = self.fig.add_subplot(111)
+        self.ax.remove()
+        self.ax = self._create_axes(self.plot_mode)
         self.lines = {}
         self.labels = []
         self.canvas.draw()
@@ -79,6 +83,8 @@ class PlotManager:
         self.canvas.draw()
 
     def save_plot(self):
+        # 仅在界面中使用，无界面环境（如不带 Tk 的 Python）不需要 tkinter
+        from tkinter import filedialog, messagebox
         try:
             file_path = filedialog.asksaveasfilename(defaultextension=".png",
                                                      filetypes=[("PNG files", "*.png"),
@@ -0,0 +1,488 @@
+# modules/render_server.py
+
+import argparse
+import hashlib
+import io
+import ipaddress
+import json
+import math
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import sympy as sp
+
+from modules.function_parser import FunctionParser
+from modules.plot_manager import PlotManager
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'json': 'application/json',
+    'npz': 'application/octet-stream',
+}
+DEFAULT_DOMAIN = {'2D': {'x': [-10, 10, 400]}, '3D': {'x': [-10, 10, 100], 'y': [-10, 10, 100]}}
+MAX_SAMPLES = 1000
+MAX_BODY_BYTES = 64 * 1024
+LOOPBACK_HOSTS = {'localhost', '127.0.0.1', '::1'}
+SYMBOLIC_TIMEOUT = 10.0
+MAX_SYMBOLIC_CHARS = 20000
+
+
+class RenderError(Exception):
+    """请求参数无效或函数无法计算。"""
+
+
+def normalize_request(payload):
+    """
+    校验并规范化渲染请求，返回的字典可直接用于计算缓存键。
+
+    :param payload: 请求 JSON，例如 {"expr": "sin(a * x)", "params": {"a": 2}, "mode": "2D", "format": "png"}
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('expr'), str):
+        raise RenderError("缺少函数表达式 expr")
+    mode = payload.get('mode', '2D')
+    if mode not in DEFAULT_DOMAIN:
+        raise RenderError(f"不支持的绘图模式: {mode}")
+    fmt = payload.get('format', 'png')
+    if fmt not in CONTENT_TYPES:
+        raise RenderError(f"不支持的输出格式: {fmt}")
+
+    domain = {}
+    for var, default in DEFAULT_DOMAIN[mode].items():
+        try:
+            low, high, num = payload.get(var, default)
+            low, high, num = float(low), float(high), int(num)
+        except (TypeError, ValueError):
+            raise RenderError(f"采样区间 {var} 应为 [起点, 终点, 点数]")
+        if not (math.isfinite(low) and math.isfinite(high)):
+            raise RenderError(f"采样区间 {var} 的端点必须是有限数")
+        if not 2 <= num <= MAX_SAMPLES:
+            raise RenderError(f"采样点数应在 2 到 {MAX_SAMPLES} 之间")
+        domain[var] = [low, high, num]
+
+    try:
+        params = {str(k): float(v) for k, v in payload.get('params', {}).items()}
+    except (AttributeError, TypeError, ValueError):
+        raise RenderError("参数 params 应为 {名称: 数值}")
+    infinite = [name for name, value in params.items() if not math.isfinite(value)]
+    if infinite:
+        raise RenderError(f"参数必须是有限数: {', '.join(infinite)}")
+
+    flags = {}
+    for name in ('derivative', 'integral'):
+        flags[name] = payload.get(name, False)
+        if not isinstance(flags[name], bool):
+            raise RenderError(f"{name} 应为 true 或 false")
+
+    return {
+        'expr': payload['expr'].strip(),
+        'mode': mode,
+        'format': fmt,
+        'domain': domain,
+        'params': params,
+        'derivative': flags['derivative'],
+        'integral': flags['integral'],
+    }
+
+
+def request_key(request):
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _symbolic_worker(conn, expr, variables, derivative, integral):
+    """
+    在子进程中解析表达式并按需求导、积分，结果以字符串形式返回。
+    """
+    try:
+        parser = FunctionParser(expr, variables=variables)
+        success, msg = parser.parse_expression()
+        if not success:
+            conn.send(('error', msg))
+            return
+        compiled = {'expr': str(parser.expr), 'derivative_expr': {}, 'integral_expr': {}}
+        for var in parser.variables:
+            if derivative:
+                compiled['derivative_expr'][str(var)] = str(sp.diff(parser.expr, var))
+            if integral:
+                compiled['integral_expr'][str(var)] = str(sp.integrate(parser.expr, var))
+        if sum(map(len, [compiled['expr'], *compiled['derivative_expr'].values(),
+                         *compiled['integral_expr'].values()])) > MAX_SYMBOLIC_CHARS:
+            conn.send(('error', "符号计算结果过大"))
+            return
+        conn.send(('ok', compiled))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+
+_symbolic_context = None
+
+
+def _get_symbolic_context():
+    global _symbolic_context
+    if _symbolic_context is None:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            # forkserver 预先导入 sympy，子进程启动快，且不会复制服务线程持有的锁
+            _symbolic_context = multiprocessing.get_context('forkserver')
+            _symbolic_context.set_forkserver_preload(['modules.render_server'])
+        else:
+            _symbolic_context = multiprocessing.get_context('spawn')
+    return _symbolic_context
+
+
+def run_symbolic(expr, variables, derivative, integral, timeout):
+    """
+    在独立进程中进行符号计算，超时后终止该进程，避免占住渲染线程。
+
+    :return: FunctionParser.load_compiled 可用的字典，另含化简后的表达式 'expr'
+    """
+    ctx = _get_symbolic_context()
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_symbolic_worker, args=(sender, expr, variables, derivative, integral),
+                          daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            raise RenderError(f"符号计算超过 {timeout:g} 秒，已放弃")
+        status, result = receiver.recv()
+    except EOFError:
+        raise RenderError("符号计算进程异常退出")
+    finally:
+        process.terminate()
+        process.join()
+        receiver.close()
+    if status != 'ok':
+        raise RenderError(result)
+    return result
+
+
+@lru_cache(maxsize=256)
+def _compile(expr, variables, derivative, integral, timeout):
+    # 失败结果同样缓存，重复的无效或超时请求不再占用工作线程
+    try:
+        compiled = run_symbolic(expr, variables, derivative, integral, timeout)
+        parser = FunctionParser(compiled['expr'], variables=variables)
+        success, msg = parser.parse_expression()
+        if success:
+            success, msg = parser.load_compiled(compiled)
+        if not success:
+            return 'error', msg
+        return 'ok', parser
+    except RenderError as e:
+        return 'error', str(e)
+
+
+def compile_expression(expr, variables, derivative=False, integral=False, timeout=SYMBOLIC_TIMEOUT):
+    """
+    解析并生成函数，只在请求需要时求导和积分，相同的组合只计算一次。
+    FunctionParser 使用白名单解析表达式，请求中的表达式不会被当作代码执行。
+    """
+    status, result = _compile(expr, tuple(variables), derivative, integral, timeout)
+    if status != 'ok':
+        raise RenderError(result)
+    return result
+
+
+def render(request, symbolic_timeout=SYMBOLIC_TIMEOUT):
+    """
+    在无界面的 PlotManager 上绘制请求的函数。
+
+    :param symbolic_timeout: 解析、求导和积分的时间上限（秒）
+    :return: (响应内容, Content-Type)
+    """
+    mode = request['mode']
+    variables = ('x', 'y') if mode == '3D' else ('x',)
+    parser = compile_expression(request['expr'], variables, request['derivative'], request['integral'],
+                                symbolic_timeout)
+    missing = [p for p in parser.params if p not in request['params']]
+    if missing:
+        raise RenderError(f"缺少参数值: {', '.join(missing)}")
+    param_values = [request['params'][p] for p in parser.params]
+
+    x_vals = np.linspace(*request['domain']['x'])
+    if mode == '3D':
+        y_vals = np.linspace(*request['domain']['y'])
+        X, Y = np.meshgrid(x_vals, y_vals)
+        args = [X, Y] + param_values
+    else:
+        args = [x_vals] + param_values
+
+    # 与界面一致：原函数、导数、积分
+    series = [('f', f"f = {parser.expr}", parser.lambdified_func, 'blue', '-')]
+    for var in parser.variables:
+        var = str(var)
+        if request['derivative']:
+            series.append((f'd_{var}', f"∂f/∂{var} = {parser.derivative_expr[var]}",
+                           parser.lambdified_derivative[var], 'green', '--'))
+        if request['integral']:
+            series.append((f'i_{var}', f"∫f d{var} = {parser.integral_expr[var]}",
+                           parser.lambdified_integral[var], 'red', ':'))
+
+    values = {}
+    try:
+        for key, label, func, color, linestyle in series:
+            # 常数表达式返回标量，扩展为与采样网格相同的形状
+            values[key] = np.broadcast_to(np.asarray(func(*args), dtype=float), args[0].shape)
+    except Exception as e:
+        raise RenderError(f"无法计算函数: {e}")
+
+    fmt = request['format']
+    if fmt == 'json':
+        data = {'x': x_vals.tolist()}
+        if mode == '3D':
+            data['y'] = y_vals.tolist()
+        data.update({key: np.where(np.isfinite(vals), vals, None).tolist() for key, vals in values.items()})
+        return json.dumps(data).encode('utf-8'), CONTENT_TYPES[fmt]
+    if fmt == 'npz':
+        buffer = io.BytesIO()
+        grids = {'x': x_vals, 'y': y_vals} if mode == '3D' else {'x': x_vals}
+        np.savez(buffer, **grids, **values)
+        return buffer.getvalue(), CONTENT_TYPES[fmt]
+
+    plot_manager = PlotManager(plot_mode=mode)
+    for key, label, func, color, linestyle in series:
+        if mode == '3D':
+            plot_manager.plot_functions_3d(X, Y, values[key], label=label, color=color)
+        else:
+            plot_manager.plot_functions_2d(x_vals, values[key], label=label, color=color, linestyle=linestyle)
+    plot_manager.ax.set_xlabel('x', fontsize=12)
+    plot_manager.ax.set_ylabel('y', fontsize=12)
+    if mode == '3D':
+        plot_manager.ax.set_zlabel('z', fontsize=12)
+    plot_manager.update_plot()
+    buffer = io.BytesIO()
+    plot_manager.fig.savefig(buffer, format=fmt)
+    return buffer.getvalue(), CONTENT_TYPES[fmt]
+
+
+class RenderService:
+    def __init__(self, workers=4, max_pending=64, cache_bytes=256 * 1024 * 1024,
+                 symbolic_timeout=SYMBOLIC_TIMEOUT):
+        """
+        渲染服务：有界线程池、按内容寻址的响应缓存，以及相同请求的合并。
+
+        :param workers: 工作线程数
+        :param max_pending: 最多同时排队和执行的渲染任务数，超出时拒绝请求
+        :param cache_bytes: 缓存响应的总字节数上限
+        :param symbolic_timeout: 每个表达式符号计算的时间上限（秒）
+        """
+        self.symbolic_timeout = symbolic_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        self.max_pending = max_pending
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.counters = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'rendered': 0,
+                         'rejected': 0, 'errors': 0}
+
+    def submit(self, request):
+        """
+        获取渲染结果，缓存命中时直接返回，相同请求正在渲染时等待同一任务。
+
+        :return: (响应内容, Content-Type)
+        """
+        key = request_key(request)
+        with self.lock:
+            self.counters['requests'] += 1
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.counters['cache_hits'] += 1
+                return self.cache[key]
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+            elif len(self.in_flight) >= self.max_pending:
+                self.counters['rejected'] += 1
+                raise OverflowError("渲染队列已满")
+            else:
+                future = self.executor.submit(self._render, key, request)
+                self.in_flight[key] = future
+        return future.result()
+
+    def _render(self, key, request):
+        start = time.perf_counter()
+        try:
+            result = render(request, symbolic_timeout=self.symbolic_timeout)
+        except Exception:
+            with self.lock:
+                self.counters['errors'] += 1
+                del self.in_flight[key]
+            raise
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+            self.counters['rendered'] += 1
+            # 按总字节数淘汰最久未使用的响应，单个超过上限的响应不缓存
+            if len(result[0]) <= self.cache_bytes:
+                self.cache[key] = result
+                self.cached_bytes += len(result[0])
+                while self.cached_bytes > self.cache_bytes:
+                    _, (body, _) = self.cache.popitem(last=False)
+                    self.cached_bytes -= len(body)
+            del self.in_flight[key]
+        return result
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            metrics = dict(self.counters)
+            metrics['queue_depth'] = len(self.in_flight)
+            metrics['cache_entries'] = len(self.cache)
+            metrics['cache_bytes'] = self.cached_bytes
+        if latencies:
+            metrics['render_latency_ms'] = {
+                'p50': 1000 * latencies[len(latencies) // 2],
+                'p95': 1000 * latencies[int(len(latencies) * 0.95)],
+                'max': 1000 * latencies[-1],
+            }
+        return metrics
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    allowed_hosts = LOOPBACK_HOSTS
+
+    def check_host(self):
+        """
+        只接受 Host 为本机地址的请求，防止 DNS 重绑定从网页访问本服务。
+        """
+        host = self.headers.get('Host', '')
+        if host.startswith('['):
+            host = host[1:host.find(']')]
+        else:
+            host = host.rsplit(':', 1)[0]
+        if host.lower() not in self.allowed_hosts:
+            self.send_error_json(403, "不允许的 Host")
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.check_host():
+            return
+        if self.path == '/metrics':
+            self.send_body(200, json.dumps(self.service.metrics()).encode('utf-8'), CONTENT_TYPES['json'])
+        elif self.path == '/health':
+            self.send_body(200, b'{"status": "ok"}', CONTENT_TYPES['json'])
+        else:
+            self.send_error_json(404, "未知路径")
+
+    def do_POST(self):
+        if not self.check_host():
+            return
+        if self.path != '/render':
+            self.send_error_json(404, "未知路径")
+            return
+        # 只接受 application/json：跨域网页无法不经预检发送该类型，而本服务从不响应预检
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type != 'application/json':
+            self.send_error_json(415, "Content-Type 必须为 application/json")
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            self.close_connection = True
+            self.send_error_json(413, f"请求体应不超过 {MAX_BODY_BYTES} 字节")
+            return
+        try:
+            request = normalize_request(json.loads(self.rfile.read(length)))
+            body, content_type = self.service.submit(request)
+        except (ValueError, RenderError) as e:
+            self.send_error_json(400, str(e))
+        except OverflowError as e:
+            self.send_error_json(503, str(e))
+        except Exception as e:
+            self.send_error_json(500, str(e))
+        else:
+            self.send_body(200, body, content_type)
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, body, CONTENT_TYPES['json'])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RenderHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认监听队列只有 5，并发压测时会出现连接被重置
+    request_queue_size = 128
+
+
+def is_loopback(host):
+    if host.lower() == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_server(host='127.0.0.1', port=8765, service=None, allow_remote=False):
+    """
+    创建 HTTP 渲染服务器，调用 serve_forever() 开始处理请求。
+
+    服务没有身份验证，默认只允许监听本机地址；allow_remote=True 时才允许其他地址。
+    """
+    if not is_loopback(host) and not allow_remote:
+        raise ValueError(f"拒绝监听非本机地址 {host}，服务没有身份验证")
+    allowed_hosts = LOOPBACK_HOSTS | {host.lower()}
+    handler = type('BoundRenderRequestHandler', (RenderRequestHandler,),
+                   {'service': service or RenderService(), 'allowed_hosts': allowed_hosts})
+    return RenderHTTPServer((host, port), handler)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="函数图像渲染服务")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--workers', type=int, default=4)
+    arg_parser.add_argument('--max-pending', type=int, default=64)
+    arg_parser.add_argument('--cache-bytes', type=int, default=256 * 1024 * 1024)
+    arg_parser.add_argument('--symbolic-timeout', type=float, default=SYMBOLIC_TIMEOUT)
+    arg_parser.add_argument('--allow-remote', action='store_true',
+                            help="允许监听非本机地址（服务没有身份验证，任何能访问该端口的人都可以使用）")
+    args = arg_parser.parse_args()
+
+    if not is_loopback(args.host):
+        if not args.allow_remote:
+            arg_parser.error(f"拒绝监听非本机地址 {args.host}，如确有需要请加 --allow-remote")
+        print(f"警告: 服务监听在 {args.host} 上且没有身份验证")
+
+    service = RenderService(workers=args.workers, max_pending=args.max_pending, cache_bytes=args.cache_bytes,
+                            symbolic_timeout=args.symbolic_timeout)
+    server = create_server(args.host, args.port, service, allow_remote=args.allow_remote)
+    print(f"渲染服务已启动: http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# modules/workspace.py
+
+import json
+import os
+import uuid
+
+import numpy as np
+
+WORKSPACE_VERSION = 2
+MANIFEST_NAME = 'manifest.json'
+
+
+def save_workspace(path, state, arrays=None):
+    """
+    保存工作区快照。
+
+    快照是一个目录：manifest.json 记录表达式、参数、模式等状态，
+    每个数组单独保存为未压缩的 .npy 文件，便于加载时使用内存映射。
+
+    每次保存的数组文件名都带有新的编号，不会覆盖旧文件；清单通过临时文件原子替换，
+    替换完成后才删除旧文件。保存中断时旧清单及其数组保持完整，
+    调用方也可以在保存时继续持有旧快照的内存映射。
+
+    :param path: 快照目录路径
+    :param state: 可 JSON 序列化的状态字典
+    :param arrays: 可选，数组名称到 numpy 数组的字典
+    """
+    arrays = arrays or {}
+    os.makedirs(path, exist_ok=True)
+
+    generation = uuid.uuid4().hex[:12]
+    files = {}
+    for name, array in arrays.items():
+        files[name] = f"{name}.{generation}.npy"
+        np.save(os.path.join(path, files[name]), np.asarray(array), allow_pickle=False)
+
+    manifest = {
+        'version': WORKSPACE_VERSION,
+        'state': state,
+        'arrays': files,
+    }
+    target = os.path.join(path, MANIFEST_NAME)
+    with open(target + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(target + '.tmp', target)
+
+    # 删除不再被清单引用的数组文件；Windows 上仍被内存映射的文件会删除失败，留待下次保存
+    for name in os.listdir(path):
+        if name.endswith('.npy') and name not in files.values():
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+
+def load_workspace(path, mmap=True):
+    """
+    加载工作区快照。
+
+    :param path: 快照目录路径
+    :param mmap: 是否以只读内存映射方式加载数组
+    :return: (state, arrays)
+    """
+    with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != WORKSPACE_VERSION:
+        raise ValueError(f"不支持的工作区版本: {manifest.get('version')}")
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {}
+    for name, filename in manifest.get('arrays', {}).items():
+        # 清单可能来自他人，只允许引用快照目录内的 .npy 文件
+        if os.path.basename(filename) != filename or not filename.endswith('.npy'):
+            raise ValueError(f"无效的数组文件名: {filename}")
+        arrays[name] = np.load(os.path.join(path, filename), mmap_mode=mmap_mode, allow_pickle=False)
+    return manifest['state'], arrays
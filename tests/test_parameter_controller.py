@@ -0,0 +1,28 @@
+import tkinter as tk
+
+import pytest
+
+from modules.parameter_controller import ParameterController
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("需要图形界面环境")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+def test_get_state_and_set_state_round_trip(root):
+    calls = []
+    controller = ParameterController(tk.Frame(root), ['b', 'a'], lambda: calls.append(1))
+    state = {'a': {'value': 2.5, 'range': [-5.0, 5.0]}, 'b': {'value': -20.0, 'range': [-30.0, 0.0]}}
+
+    controller.set_state(state)
+
+    assert calls == []
+    assert controller.get_state() == state
+    assert controller.get_param_values() == [2.5, -20.0]
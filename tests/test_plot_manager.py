@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import matplotlib.pyplot as plt
+
+from bench.plot_manager_stress import check_flat, run_stress
+from modules.plot_manager import PlotManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_headless_plot_manager_is_not_registered_with_pyplot():
+    pm = PlotManager()
+    assert pm.parent_frame is None
+    assert plt.get_fignums() == []
+    assert len(pm.fig.axes) == 1
+
+
+def test_switch_mode_replaces_axes():
+    pm = PlotManager()
+    for mode in ['3D', '2D', '3D', '3D', '2D']:
+        pm.switch_mode(mode)
+        assert pm.plot_mode == mode
+        assert pm.fig.axes == [pm.ax]
+        assert (pm.ax.name == '3d') == (mode == '3D')
+
+
+def test_short_stress_run_stays_flat():
+    # 完整的长时间压力测试见 python -m bench.plot_manager_stress
+    result = run_stress(iterations=40, window=10, warmup=10)
+    assert check_flat(result) == []
+    assert plt.get_fignums() == []
+
+
+def test_headless_modules_import_without_tkinter():
+    # 模拟不带 Tk 的 Python：拦截 tkinter 导入后仍能导入渲染服务并绘图
+    code = (
+        "import builtins\n"
+        "real_import = builtins.__import__\n"
+        "def fake_import(name, *args, **kwargs):\n"
+        "    if name.split('.')[0] in ('tkinter', '_tkinter'):\n"
+        "        raise ImportError(name)\n"
+        "    return real_import(name, *args, **kwargs)\n"
+        "builtins.__import__ = fake_import\n"
+        "import modules.render_server\n"
+        "from modules.plot_manager import PlotManager\n"
+        "PlotManager().update_plot()\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
+
+
+def test_check_flat_tolerates_one_step_but_not_a_trend():
+    def result(memory):
+        return {'windows': [(m, 0.2) for m in memory], 'window': 100, 'max_axes': 1}
+
+    # 约 840 次迭代时解释器字符串表扩容的实测形态：一次跳变，其余平稳
+    assert check_flat(result([890e3] * 8 + [2770e3] * 12)) == []
+    # 每次迭代泄漏 500 字节：每个窗口增长 50 KB
+    assert check_flat(result([730e3 + i * 50e3 for i in range(20)])) != []
+    # 一次跳变叠加缓慢泄漏
+    assert check_flat(result([730e3 + i * 5e3 + (2e6 if i > 8 else 0) for i in range(20)])) != []
@@ -0,0 +1,201 @@
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from modules import render_server
+from modules.render_server import RenderError, RenderService, create_server, normalize_request
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+
+    def start(**kwargs):
+        service = RenderService(**kwargs)
+        server = create_server(port=0, service=service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append((server, service))
+        return f"http://127.0.0.1:{server.server_port}", service
+
+    yield start
+    for server, service in servers:
+        server.shutdown()
+        server.server_close()
+        service.shutdown()
+
+
+def post(url, payload, headers=None, path='/render'):
+    data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(url + path, data=data, method='POST',
+                                     headers=headers or {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers['Content-Type'], response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers['Content-Type'], e.read()
+
+
+def blocking_render(monkeypatch):
+    # 渲染在 release 之前一直阻塞，便于构造并发场景
+    release = threading.Event()
+    original = render_server.render
+
+    def render(request, **kwargs):
+        release.wait(10)
+        return original(request, **kwargs)
+
+    monkeypatch.setattr(render_server, 'render', render)
+    return release
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize('fmt, content_type, magic', [
+    ('png', 'image/png', b'\x89PNG'),
+    ('svg', 'image/svg+xml', b'<?xml'),
+])
+def test_render_images(make_server, fmt, content_type, magic):
+    url, _ = make_server()
+    status, ctype, body = post(url, {'expr': 'sin(a * x) * y', 'params': {'a': 2}, 'mode': '3D',
+                                     'x': [-3, 3, 20], 'y': [-3, 3, 20], 'derivative': True, 'format': fmt})
+    assert (status, ctype) == (200, content_type)
+    assert body.startswith(magic)
+
+
+def test_render_json_and_npz_data(make_server):
+    url, _ = make_server()
+    payload = {'expr': 'a * x**2', 'params': {'a': 3}, 'x': [-1, 1, 5], 'derivative': True}
+
+    status, ctype, body = post(url, dict(payload, format='json'))
+    assert (status, ctype) == (200, 'application/json')
+    data = json.loads(body)
+    np.testing.assert_allclose(data['f'], 3 * np.linspace(-1, 1, 5) ** 2)
+    np.testing.assert_allclose(data['d_x'], 6 * np.linspace(-1, 1, 5))
+
+    status, ctype, body = post(url, dict(payload, format='npz'))
+    assert (status, ctype) == (200, 'application/octet-stream')
+    arrays = np.load(io.BytesIO(body))
+    np.testing.assert_allclose(arrays['f'], data['f'])
+
+
+def test_missing_parameter_is_bad_request(make_server):
+    url, _ = make_server()
+    status, _, body = post(url, {'expr': 'a * x', 'format': 'json'})
+    assert status == 400
+    assert 'a' in json.loads(body)['error']
+
+
+def test_expression_cannot_run_code(make_server, tmp_path):
+    url, _ = make_server()
+    target = tmp_path / 'pwned'
+    status, _, _ = post(url, {'expr': f"__import__('os').system('touch {target}') + x", 'format': 'json'})
+    assert status == 400
+    assert not target.exists()
+
+
+def test_rejects_non_json_content_type_and_foreign_host(make_server):
+    url, _ = make_server()
+    payload = {'expr': 'x', 'format': 'json'}
+    assert post(url, payload, headers={'Content-Type': 'text/plain'})[0] == 415
+    assert post(url, payload, headers={'Content-Type': 'application/json', 'Host': 'evil.example'})[0] == 403
+    assert post(url, b'x' * (render_server.MAX_BODY_BYTES + 1))[0] == 413
+
+
+def test_flags_must_be_json_bool():
+    with pytest.raises(RenderError):
+        normalize_request({'expr': 'x', 'derivative': 'false'})
+    assert normalize_request({'expr': 'x', 'integral': True})['integral'] is True
+
+
+def test_create_server_refuses_non_loopback_host():
+    with pytest.raises(ValueError):
+        create_server('0.0.0.0', port=0)
+
+
+def test_identical_requests_are_coalesced_and_cached(make_server, monkeypatch):
+    release = blocking_render(monkeypatch)
+    url, service = make_server(workers=1)
+    payload = {'expr': 'cos(x)', 'format': 'json'}
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(post, url, payload) for _ in range(3)]
+        wait_until(lambda: service.metrics()['coalesced'] == 2)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert {body for _, _, body in results} == {results[0][2]}
+    assert post(url, payload)[2] == results[0][2]
+    metrics = service.metrics()
+    assert (metrics['rendered'], metrics['coalesced'], metrics['cache_hits']) == (1, 2, 1)
+
+
+def test_burst_above_max_pending_is_rejected(make_server, monkeypatch):
+    release = blocking_render(monkeypatch)
+    url, service = make_server(workers=1, max_pending=2)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(post, url, {'expr': f'x + {i}', 'format': 'json'}) for i in range(2)]
+        wait_until(lambda: service.metrics()['queue_depth'] == 2)
+        assert post(url, {'expr': 'x + 2', 'format': 'json'})[0] == 503
+        release.set()
+        assert [future.result()[0] for future in futures] == [200, 200]
+    assert service.metrics()['rejected'] == 1
+
+
+def test_cache_is_bounded_by_bytes(make_server):
+    url, service = make_server(cache_bytes=3000)
+    for i in range(5):
+        status, _, _ = post(url, {'expr': f'x + {i}', 'x': [0, 1, 50], 'format': 'json'})
+        assert status == 200
+    metrics = service.metrics()
+    assert metrics['cache_bytes'] <= 3000
+    assert 1 <= metrics['cache_entries'] < 5
+
+
+def test_symbolic_work_only_for_requested_series(make_server):
+    url, _ = make_server()
+    # x**x 的积分无法生成 numpy 代码，但不请求积分时应能正常绘制
+    status, _, body = post(url, {'expr': 'x**x', 'x': [0.5, 2, 4], 'format': 'json'})
+    assert status == 200
+    np.testing.assert_allclose(json.loads(body)['f'], np.linspace(0.5, 2, 4) ** np.linspace(0.5, 2, 4))
+    status, _, _ = post(url, {'expr': 'x**x', 'x': [0.5, 2, 4], 'integral': True, 'format': 'json'})
+    assert status == 400
+
+
+def test_slow_symbolic_work_times_out_and_failure_is_cached(make_server):
+    url, _ = make_server(symbolic_timeout=1)
+    payload = {'expr': 'sin(a*x)*exp(-b*x**2)*log(x)', 'params': {'a': 1, 'b': 1},
+               'integral': True, 'format': 'json'}
+
+    start = time.perf_counter()
+    status, _, body = post(url, payload)
+    assert status == 400
+    assert '符号计算' in json.loads(body)['error']
+    assert time.perf_counter() - start < 10
+
+    # 参数不同、表达式相同：直接使用缓存的失败结果
+    start = time.perf_counter()
+    assert post(url, dict(payload, params={'a': 2, 'b': 1}))[0] == 400
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.parametrize('body', [
+    b'{"expr": "x", "x": [0, 1e400, 5], "format": "json"}',
+    b'{"expr": "x", "x": [NaN, 1, 5], "format": "json"}',
+    b'{"expr": "a * x", "params": {"a": -Infinity}, "format": "json"}',
+])
+def test_non_finite_numbers_are_bad_request(make_server, body):
+    url, _ = make_server()
+    assert post(url, body)[0] == 400
@@ -0,0 +1,134 @@
+import json
+
+import numpy as np
+import pytest
+import sympy as sp
+
+from modules.function_parser import FunctionParser, parse_safe_expression
+from modules.workspace import load_workspace, save_workspace
+
+
+def make_parser(func_str, variables):
+    parser = FunctionParser(func_str, variables=variables)
+    assert parser.parse_expression() == (True, "")
+    return parser
+
+
+def test_save_and_load_workspace_round_trip(tmp_path):
+    path = tmp_path / "session.fgp"
+    X, Y = np.meshgrid(np.linspace(-1, 1, 30), np.linspace(-2, 2, 20))
+    state = {'func_str': "sin(a * x) * y", 'plot_mode': '3D', 'params': {'a': {'value': 2.0, 'range': [-5, 5]}}}
+
+    save_workspace(str(path), state, {'X': X, 'Y': Y, 'f': np.sin(2 * X) * Y})
+    loaded_state, arrays = load_workspace(str(path))
+
+    assert loaded_state == state
+    assert sorted(arrays) == ['X', 'Y', 'f']
+    assert isinstance(arrays['f'], np.memmap)
+    np.testing.assert_array_equal(arrays['f'], np.sin(2 * X) * Y)
+
+    # 持有旧快照的内存映射时覆盖保存，旧文件在新清单写入后被删除
+    save_workspace(str(path), state, {'X': arrays['X']})
+    _, arrays = load_workspace(str(path), mmap=False)
+    assert sorted(arrays) == ['X']
+    np.testing.assert_array_equal(arrays['X'], X)
+    assert sorted(p.suffix for p in path.iterdir()) == ['.json', '.npy']
+
+
+def test_interrupted_save_keeps_previous_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "session.fgp")
+    save_workspace(path, {'n': 1}, {'x': np.arange(3), 'f': np.arange(3) ** 2})
+
+    def failing_save(file, array, allow_pickle):
+        if 'f.' in str(file):
+            raise OSError("disk full")
+        original_save(file, array, allow_pickle=allow_pickle)
+
+    original_save = np.save
+    monkeypatch.setattr(np, 'save', failing_save)
+    with pytest.raises(OSError):
+        save_workspace(path, {'n': 2}, {'x': np.arange(5), 'f': np.arange(5) ** 2})
+    monkeypatch.undo()
+
+    state, arrays = load_workspace(path)
+    assert state == {'n': 1}
+    np.testing.assert_array_equal(arrays['f'], np.arange(3) ** 2)
+
+
+def test_load_workspace_rejects_unknown_version(tmp_path):
+    save_workspace(str(tmp_path), {})
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({'version': 999, 'state': {}, 'arrays': {}}))
+    with pytest.raises(ValueError):
+        load_workspace(str(tmp_path))
+
+
+def test_load_workspace_rejects_paths_outside_snapshot(tmp_path):
+    save_workspace(str(tmp_path), {})
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({'version': 2, 'state': {}, 'arrays': {'x': '../secret.npy'}}))
+    with pytest.raises(ValueError):
+        load_workspace(str(tmp_path))
+
+
+@pytest.mark.parametrize('func_str, variables, numeric_integrals', [
+    ("sin(a * x) + b * x**2", ('x',), ('x',)),
+    # 对 x 的积分含 erf，numpy 模式下无法对数组求值，只比较表达式
+    ("sin(a * x) * y + Max(x, b) + exp(-x**2)", ('x', 'y'), ('y',)),
+])
+def test_export_and_load_compiled_round_trip(func_str, variables, numeric_integrals):
+    original = make_parser(func_str, variables)
+    assert original.generate_functions() == (True, "")
+    compiled = json.loads(json.dumps(original.export_compiled()))
+
+    restored = make_parser(func_str, variables)
+    assert restored.load_compiled(compiled) == (True, "")
+
+    grid = np.meshgrid(*[np.linspace(-2, 2, 15)] * len(variables))
+    args = list(grid) + [1.5, 0.5]
+    np.testing.assert_allclose(restored.lambdified_func(*args), original.lambdified_func(*args))
+    for var in original.derivative_expr:
+        assert restored.derivative_expr[var] == original.derivative_expr[var]
+        np.testing.assert_allclose(restored.lambdified_derivative[var](*args),
+                                   original.lambdified_derivative[var](*args))
+    for var in original.integral_expr:
+        assert restored.integral_expr[var] == original.integral_expr[var]
+    for var in numeric_integrals:
+        np.testing.assert_allclose(restored.lambdified_integral[var](*args),
+                                   original.lambdified_integral[var](*args))
+
+
+@pytest.mark.parametrize('expr', [
+    "__import__('os').system('true') + x",
+    "x.func",
+    "sin('x')",
+    "(lambda: 1)() + x",
+    "x1.func",
+    "1..real + x",
+    "x.__class__",
+])
+def test_parse_safe_expression_rejects_code(expr):
+    with pytest.raises(ValueError):
+        parse_safe_expression(expr)
+
+
+def test_parse_safe_expression_keeps_math_syntax():
+    x = parse_safe_expression("x")
+    assert parse_safe_expression("x^2 + 1.5 * x") == x ** 2 + 1.5 * x
+    assert parse_safe_expression("1.e3*x") == 1000.0 * x
+    assert parse_safe_expression("abs(x) + max(x, 1) + min(x, 2)") == sp.Abs(x) + sp.Max(x, 1) + sp.Min(x, 2)
+    assert str(parse_safe_expression("Piecewise((-cos(a*x)/a, Ne(a, 0)), (0, True))")) == \
+        "Piecewise((-cos(a*x)/a, Ne(a, 0)), (0, True))"
+
+
+@pytest.mark.parametrize('func_str, expected', [
+    ("abs(x)", np.abs),
+    ("max(x, 1)", lambda x: np.maximum(x, 1)),
+    ("min(x, 1)", lambda x: np.minimum(x, 1)),
+])
+def test_builtin_function_names_still_work(func_str, expected):
+    # 只检查原函数：对复数符号 x，Abs 的导数含 Derivative(re(x))，与 sympify 时一样无法生成 numpy 代码
+    parser = make_parser(func_str, ('x',))
+    func = sp.lambdify(parser.variables, parser.expr, modules=['numpy'])
+    x = np.linspace(-2, 2, 9)
+    np.testing.assert_allclose(func(x), expected(x))